@@ -0,0 +1,43 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Reports how compressing the data in main.py before it is
+#              split into segments changes the number of iterations and
+#              segments needed to send it. Every compression method is run
+#              against the same seeded loss patterns.
+#
+#              Usage: python compression_report.py [number of runs]
+#############################################################################
+import sys
+
+from main import dataToSend
+from simulation import average_transfers
+
+# Compression methods to compare, None sends the data as-is
+METHODS = [None, 'zlib', 'lzma']
+DEFAULT_RUNS = 50
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+
+    print("{0} runs per method, {1} chars of data\n"
+          .format(runs, len(dataToSend)))
+    print("{0:>8} {1:>7} {2:>11} {3:>9} {4:>13} {5:>9}".format(
+        'method', 'ratio', 'iterations', 'saving', 'data packets',
+        'saving'))
+
+    baseline = None
+    for method in METHODS:
+        means = average_transfers(dataToSend, runs, compression=method)
+        if baseline is None:
+            baseline = means
+        print("{0:>8} {1:>7.2f} {2:>11.1f} {3:>9.0%} {4:>13.1f} {5:>9.0%}"
+              .format(method or 'none', means['compression_ratio'],
+                      means['iterations'],
+                      1 - means['iterations'] / baseline['iterations'],
+                      means['data_packets'],
+                      1 - means['data_packets'] / baseline['data_packets']))
+
+
+if __name__ == '__main__':
+    main()
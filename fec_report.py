@@ -0,0 +1,50 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Reports how forward error correction changes the number of
+#              iterations needed to send the data in main.py and the
+#              channel overhead, for a range of FEC block sizes. Every block
+#              size is run against the same seeded loss patterns.
+#
+#              Usage: python fec_report.py [number of runs]
+#############################################################################
+import sys
+
+from main import dataToSend
+from simulation import average_transfers
+
+# FEC block sizes to compare, 0 is no forward error correction. Smaller
+# blocks mean more redundancy.
+BLOCK_SIZES = [0, 1, 2, 3]
+DEFAULT_RUNS = 50
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+
+    print("{0} runs per block size, {1} chars of data\n"
+          .format(runs, len(dataToSend)))
+    print("{0:>10} {1:>11} {2:>13} {3:>15} {4:>11} {5:>10} {6:>10}".format(
+        'block size', 'iterations', 'data packets', 'parity packets',
+        'recovered', 'timeouts', 'overhead'))
+
+    baseline = None
+    for block_size in BLOCK_SIZES:
+        means = average_transfers(dataToSend, runs,
+                                  fec_block_size=block_size)
+
+        # channel overhead is every packet put on either channel relative
+        # to the run without forward error correction
+        packets = means['data_packets'] + means['parity_packets'] + \
+            means['ack_packets']
+        if baseline is None:
+            baseline = packets
+        label = 'off' if block_size == 0 else block_size
+        print("{0:>10} {1:>11.1f} {2:>13.1f} {3:>15.1f} {4:>11.1f} "
+              "{5:>10.1f} {6:>9.0%}".format(
+                  label, means['iterations'], means['data_packets'],
+                  means['parity_packets'], means['recovered'],
+                  means['timeouts'], packets / baseline - 1))
+
+
+if __name__ == '__main__':
+    main()
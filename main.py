@@ -1,9 +1,14 @@
 # Date:        5/1/2020
 # Description: Code entry point for simulating reliable data transmission
 #              over an unreliable channel.
-#              The code was provided and has not been modified except to
-#              set flags to introduce several types of unreliablity to
-#              the underlying channel.
+#              The code was provided and has since been modified to:
+#              * set flags to introduce several types of unreliablity to
+#                the underlying channel
+#              * record or replay the channels' impairment decisions
+#              * set the forward error correction block size and the
+#                compression method
+#              * run the simulation only when executed as a script, so
+#                the reports can import dataToSend
 
 import time
 
@@ -57,70 +62,119 @@ dataToSend = "\r\n\r\nAmerican Kennel Club -- Labradors \r\n\r\n" \
              "not too cold—but, with proper " \
              "care, Pugs can be their adorable selves anywhere.\r\n"
 
-client = ReliableLayer()
-server = ReliableLayer()
-
 # Start with a reliable channel (all flags false)
 outOfOrder = True
 dropPackets = True
 delayPackets = True
 dataErrors = True
 
-clientToServerChannel = Channel(outOfOrder, dropPackets, delayPackets,
-                                dataErrors)
-serverToClientChannel = Channel(outOfOrder, dropPackets, delayPackets,
-                                dataErrors)
-
-client.set_send_channel(clientToServerChannel)
-client.set_receive_channel(serverToClientChannel)
-
-server.set_send_channel(serverToClientChannel)
-server.set_receive_channel(clientToServerChannel)
-
-client.set_data_to_send(dataToSend)
-
-loopIter = 1
-while True:
-    client.manage()
-
-    clientToServerChannel.manage()
-
-    server.manage()
-
-    serverToClientChannel.manage()
-
-    # show the data received so far
-    dataReceived = server.get_data_received()
-
-    if dataReceived == dataToSend:
-        print("\ndataReceived: {0}\n".format(dataReceived))
-        print('$$$$$$$$ ALL DATA RECEIVED $$$$$$$$')
-        break
-
-    loopIter += 1
-
-print("count_total_data_packets: {0}".format(clientToServerChannel.
-                                             count_total_data_packets))
-print("count_sent_packets: {0}".format(clientToServerChannel.
-                                       count_sent_packets +
-                                       serverToClientChannel.
-                                       count_sent_packets))
-print("count_checksum_error_packets: {0}".format(clientToServerChannel.
-                                                 count_checksum_error_packets))
-print("count_out_of_order_packets: {0}".format(clientToServerChannel.
-                                               count_out_of_order_packets))
-print("count_delayed_packets: {0}".format(clientToServerChannel.
-                                          count_delayed_packets +
-                                          serverToClientChannel.
-                                          count_delayed_packets))
-print("countDroppedDataPackets: {0}".format(clientToServerChannel.
-                                            count_dropped_packets))
-print("count_ack_packets: {0}".format(serverToClientChannel.count_ack_packets))
-print("countDroppedAckPackets: {0}".format(serverToClientChannel.
-                                           count_dropped_packets))
-
-print("# segment timeouts: {0}".format(client.count_segment_timeouts))
-
-print("TOTAL ITERATIONS: {0}".format(loopIter))
-
-print("\n...exactus...\n")
+# The impairment decisions of each channel can be recorded to a decision
+# log ('record') or fed back from one ('replay') so a run can be reproduced
+# exactly. None draws them from the global random module.
+# The log holds one stream per kind of decision (drop, delay, ...), not one
+# entry per segment, so after a protocol change the n-th drop decision may
+# land on a different segment. If the changed protocol needs more decisions
+# than were recorded the rest are drawn from the global random module.
+decisionLogMode = None
+clientToServerDecisionLog = 'client_to_server.decisions'
+serverToClientDecisionLog = 'server_to_client.decisions'
+
+# The number of data segments protected by each parity segment when using
+# forward error correction. 0 turns forward error correction off.
+fecBlockSize = 0
+
+# The data can be compressed before it is split into segments. Set to
+# 'zlib' or 'lzma', or None to send the data as-is.
+compression = None
+
+
+def make_decisions(path):
+    if decisionLogMode == 'record':
+        return DecisionRecorder()
+    if decisionLogMode == 'replay':
+        return DecisionReplayer.load(path, fallback=RandomDecisions())
+    return None
+
+
+if __name__ == '__main__':
+    client = ReliableLayer()
+    server = ReliableLayer()
+
+    client.set_fec_block_size(fecBlockSize)
+    server.set_fec_block_size(fecBlockSize)
+
+    client.set_compression(compression)
+    server.set_compression(compression)
+
+    clientToServerChannel = Channel(outOfOrder, dropPackets, delayPackets,
+                                    dataErrors, decisions_=make_decisions(
+                                        clientToServerDecisionLog))
+    serverToClientChannel = Channel(outOfOrder, dropPackets, delayPackets,
+                                    dataErrors, decisions_=make_decisions(
+                                        serverToClientDecisionLog))
+
+    client.set_send_channel(clientToServerChannel)
+    client.set_receive_channel(serverToClientChannel)
+
+    server.set_send_channel(serverToClientChannel)
+    server.set_receive_channel(clientToServerChannel)
+
+    client.set_data_to_send(dataToSend)
+
+    loopIter = 1
+    while True:
+        client.manage()
+
+        clientToServerChannel.manage()
+
+        server.manage()
+
+        serverToClientChannel.manage()
+
+        # show the data received so far
+        dataReceived = server.get_data_received()
+
+        if dataReceived == dataToSend:
+            print("\ndataReceived: {0}\n".format(dataReceived))
+            print('$$$$$$$$ ALL DATA RECEIVED $$$$$$$$')
+            break
+
+        loopIter += 1
+
+    if decisionLogMode == 'record':
+        clientToServerChannel.decisions.save(clientToServerDecisionLog)
+        serverToClientChannel.decisions.save(serverToClientDecisionLog)
+
+    # the channel counts parity segments as data packets too
+    print("count_total_data_packets: {0}".format(
+        clientToServerChannel.count_total_data_packets -
+        clientToServerChannel.count_parity_packets))
+    print("count_sent_packets: {0}".format(clientToServerChannel.
+                                           count_sent_packets +
+                                           serverToClientChannel.
+                                           count_sent_packets))
+    print("count_checksum_error_packets: {0}".format(
+        clientToServerChannel.count_checksum_error_packets))
+    print("count_out_of_order_packets: {0}".format(clientToServerChannel.
+                                                   count_out_of_order_packets))
+    print("count_delayed_packets: {0}".format(clientToServerChannel.
+                                              count_delayed_packets +
+                                              serverToClientChannel.
+                                              count_delayed_packets))
+    print("countDroppedDataPackets: {0}".format(clientToServerChannel.
+                                                count_dropped_packets))
+    print("count_ack_packets: {0}".format(serverToClientChannel.
+                                          count_ack_packets))
+    print("countDroppedAckPackets: {0}".format(serverToClientChannel.
+                                               count_dropped_packets))
+
+    print("# segment timeouts: {0}".format(client.count_segment_timeouts))
+    print("# parity segments sent: {0}".format(client.
+                                               count_parity_segments_sent))
+    print("# segments recovered: {0}".format(server.count_segments_recovered))
+    print("compression ratio: {0:.2f}".format(client.
+                                              get_compression_ratio()))
+
+    print("TOTAL ITERATIONS: {0}".format(loopIter))
+
+    print("\n...exactus...\n")
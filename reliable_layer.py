@@ -29,6 +29,23 @@
 # roundtrip time.
 #
 # * One roundtrip time is equivalent to 2 iterations.
+#
+# * Optional forward error correction. When a FEC block size is set the
+# client follows every block of that many data segments (and the last,
+# possibly shorter, block of each batch) with a parity segment holding the
+# XOR of the block's payloads. If exactly one segment of a block is lost or
+# fails its checksum the server rebuilds it from the parity segment and the
+# rest of the block instead of waiting for a retransmission.
+#
+# * Optional compression. When both ends set a compression method ('zlib' or
+# 'lzma') the client compresses the data before splitting it into segments
+# and the server decompresses the in-order data as it is received. The
+# compressed bytes are carried one per char so segment numbers still count
+# chars.
+
+import codecs
+import sys
+import zlib
 
 from unreliable_channel import *
 
@@ -43,6 +60,9 @@ class ReliableLayer(object):
     BASIC_RTT = 2
     # The maximum size of the time delay
     RTT_MAX = 4
+    # The number of data segments protected by each parity segment. Zero
+    # turns forward error correction off
+    FEC_BLOCK_SIZE = 0
 
     # Add class members as needed...
     #
@@ -85,6 +105,26 @@ class ReliableLayer(object):
         self.rtt = self.BASIC_RTT
         # A counter that holds the number of segment timeouts
         self.count_segment_timeouts = 0
+        # The number of data segments per parity segment, 0 if FEC is off
+        self.fec_block_size = self.FEC_BLOCK_SIZE
+        # Parity segments received by the server that may still be needed
+        # to rebuild a segment, stored as parity_received[block seqnum] =
+        # parity segment
+        self.parity_received = {}
+        # Counters for the parity segments sent and the segments rebuilt
+        # from them
+        self.count_parity_segments_sent = 0
+        self.count_segments_recovered = 0
+        # The compression method, None if the data is sent as-is
+        self.compression = None
+        # Used by the server to decompress the in-order data received and
+        # decode it back into text, which is held in data_received
+        self.decompressor = None
+        self.text_decoder = None
+        self.data_received = ''
+        # The number of chars of data before and after compression
+        self.uncompressed_size = 0
+        self.compressed_size = 0
 
     # Called by main to set the unreliable sending lower-layer channel
     def set_send_channel(self, channel):
@@ -96,13 +136,64 @@ class ReliableLayer(object):
 
     # Called by main to set the string data to send
     def set_data_to_send(self, data):
-        self.data_to_send = data
+        self.uncompressed_size = len(data)
+        if self.compression == 'zlib':
+            compressor = zlib.compressobj(zlib.Z_BEST_COMPRESSION)
+        elif self.compression == 'lzma':
+            # imported here as Python can be built without lzma support
+            import lzma
+            compressor = lzma.LZMACompressor()
+        else:
+            self.data_to_send = data
+            self.compressed_size = len(data)
+            return
+
+        compressed = compressor.compress(data.encode('utf-8')) + \
+            compressor.flush()
+        # latin-1 maps each byte to the char with the same value
+        self.data_to_send = compressed.decode('latin-1')
+        self.compressed_size = len(self.data_to_send)
+
+    # Called by main to set the compression method, 'zlib', 'lzma' or None
+    # for no compression. Both ends must use the same method and it must be
+    # set before any data is sent or received
+    def set_compression(self, method):
+        if method not in (None, 'zlib', 'lzma'):
+            raise ValueError("unknown compression method: {0}"
+                             .format(method))
+        if self.data_to_send != '' or self.message_received != '':
+            raise ValueError("the compression method must be set before "
+                             "any data is sent or received")
+        self.compression = method
+        self.decompressor = None
+        self.text_decoder = None
+        if method == 'zlib':
+            self.decompressor = zlib.decompressobj()
+        elif method == 'lzma':
+            import lzma
+            self.decompressor = lzma.LZMADecompressor()
+        if method is not None:
+            self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+    # Called by main to get the ratio of the chars sent to the chars of data
+    # given to set_data_to_send
+    def get_compression_ratio(self):
+        if self.uncompressed_size == 0:
+            return 1.0
+        return self.compressed_size / self.uncompressed_size
+
+    # Called by main to set the number of data segments per parity segment.
+    # Both ends must use the same value, 0 turns FEC off
+    def set_fec_block_size(self, size):
+        self.fec_block_size = size
 
     # Called by main to get the currently received and buffered string data,
     # in order
     def get_data_received(self):
         # Note: message Received is obtained with function:
         # add_data_received(self, data, segment_numbers)
+        if self.compression is not None:
+            return self.data_received
         return self.message_received
 
     # "timeslice". Called by main once per iteration
@@ -174,6 +265,10 @@ class ReliableLayer(object):
         # holds the size of the each segment sent as the number of chars
         payloadSize = 0
 
+        # holds the (seqnum, payload) pairs sent since the last parity
+        # segment when FEC is on
+        fec_block = []
+
         # Keep sending segments until have sent an amount of data that is <=
         # FLOW_CTRL_WINDOW_SIZE
         while True:
@@ -224,6 +319,17 @@ class ReliableLayer(object):
             # Use the unreliable send_channel to send the segment
             self.send_channel.send(seg)
 
+            # follow each full FEC block with its parity segment
+            if self.fec_block_size > 0:
+                fec_block.append((self.seqnum, data))
+                if len(fec_block) == self.fec_block_size:
+                    self.send_parity(fec_block)
+                    fec_block = []
+
+        # protect the last partial block of the batch as well
+        if fec_block:
+            self.send_parity(fec_block)
+
         # start monitoring the time for catching timeouts
         self.send_time = self.current_iteration
 
@@ -271,6 +377,13 @@ class ReliableLayer(object):
                 # if the packet passes the checksum test then process it
                 if check_checksum_result:
 
+                    # keep parity segments for blocks that have not been
+                    # fully received yet
+                    if item.is_parity():
+                        if item.seq_num + item.parity_span > self.acknum:
+                            self.parity_received[item.seq_num] = item
+                        continue
+
                     # variables used to add packet to dictionary[item_seq_num]
                     # = payload
                     word = item.payload
@@ -305,6 +418,11 @@ class ReliableLayer(object):
                     self.segments_received[key] = self.segments_waiting[key]
                 self.segments_waiting.clear()  # clear the dictionary
 
+            # rebuild any segment that is the only one missing from a block
+            # a parity segment has been received for
+            if len(self.parity_received) > 0:
+                self.recover_segments(segment_numbers)
+
             # if after some initial processing there are elements in the
             # segments_received dictionary then check for missing segments
             # and if there are none add the payloads to the receiveString
@@ -345,6 +463,72 @@ class ReliableLayer(object):
             # Use the unreliable send_channel to send the ack packet
             self.send_channel.send(ack)
 
+    # Send a parity segment for a block of data segments.
+    # input: a list of (seqnum, payload) pairs in the order they were sent
+    def send_parity(self, block):
+        data = self.xor_payloads([payload for _, payload in block])
+        # the XOR of two valid code points can be out of range, in which
+        # case this block is left to the normal retransmission
+        if data is None:
+            return
+        span = sum(len(payload) for _, payload in block)
+        parity = Segment()
+        parity.set_parity(block[0][0], span, data)
+        self.send_channel.send(parity)
+        self.count_parity_segments_sent += 1
+
+    # XOR payloads together character by character. Shorter payloads are
+    # treated as padded with zeros.
+    # input: a list of payload strings
+    # output: the XOR string or None if a result is not a valid code point
+    def xor_payloads(self, payloads):
+        size = max(len(payload) for payload in payloads)
+        values = [0] * size
+        for payload in payloads:
+            for i, char in enumerate(payload):
+                values[i] ^= ord(char)
+        if max(values) > sys.maxunicode:
+            return None
+        return ''.join(map(chr, values))
+
+    # Rebuild segments from the parity segments received so far. A block
+    # can be rebuilt when all of its segments but one have either been
+    # added to the received data or are in segments_received.
+    # input: the list of segment numbers in segments_received, which the
+    #        rebuilt segment numbers are appended to
+    def recover_segments(self, segment_numbers):
+        received_size = len(self.message_received)
+        for start in list(self.parity_received.keys()):
+            parity = self.parity_received[start]
+            end = start + parity.parity_span
+
+            # the block has already been added to the received data
+            if end <= received_size:
+                del self.parity_received[start]
+                continue
+
+            payloads = [parity.payload]
+            missing = []
+            for seq in range(start, end, self.STRING_DATA_LENGTH):
+                if seq < received_size:
+                    payloads.append(self.message_received[
+                                    seq: seq + self.STRING_DATA_LENGTH])
+                elif seq in self.segments_received:
+                    payloads.append(self.segments_received[seq])
+                else:
+                    missing.append(seq)
+
+            if len(missing) != 1:
+                continue
+
+            seq = missing[0]
+            length = min(self.STRING_DATA_LENGTH, end - seq)
+            self.segments_received[seq] = \
+                self.xor_payloads(payloads)[:length]
+            segment_numbers.append(seq)
+            self.count_segments_recovered += 1
+            del self.parity_received[start]
+
     # Verify that there are no missing segments by looking for gaps in the
     # segment numbers. input: a list of segment numbers a dictionary of the
     # form dict[segnum] = payload output: a boolean that is true if there
@@ -405,10 +589,17 @@ class ReliableLayer(object):
 
         next_num = segment_numbers[0]  # initialize next_num
 
+        new_data = ''
         for i in range(len(data)):
             next_num = segment_numbers[i]
-            self.message_received += data[next_num]  # concatenated the next
-            # payload string
+            new_data += data[next_num]  # concatenated the next payload
+            # string
+        self.message_received += new_data
+
+        # decompress the newly received in-order data
+        if self.decompressor is not None:
+            self.data_received += self.text_decoder.decode(
+                self.decompressor.decompress(new_data.encode('latin-1')))
 
         return next_num + len(data[next_num])  # return last segment number +
         # segment size = new ack #
@@ -423,6 +614,7 @@ class ReliableLayer(object):
         seg.seq_num = item.seq_num
         seg.ack_num = item.ack_num
         seg.payload = item.payload
+        seg.parity_span = item.parity_span
         return seg.check_checksum()
 
     # Add dictionary data to the segments_waiting dictionary.
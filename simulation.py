@@ -0,0 +1,113 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Runs one complete transfer over a pair of unreliable
+#              channels without printing anything, so that reports can
+#              compare protocol settings against the same seeded loss
+#              patterns.
+#############################################################################
+import random
+
+from reliable_layer import *
+
+# Give up on a transfer that has not completed after this many iterations
+MAX_ITERATIONS = 100000
+
+
+# Set up a client and a server joined by a pair of unreliable channels,
+# with the data ready to send.
+# input: the string to send
+#        the seed for the channels' impairment decisions
+#        the number of data segments per parity segment (0 is no FEC)
+#        the compression method, 'zlib', 'lzma' or None
+#        an optional (client to server, server to client) pair of decision
+#        sources, used instead of the seed
+# output: the client, the server, the client to server channel and the
+#         server to client channel
+def make_transfer(data, seed, fec_block_size=0, compression=None,
+                  decisions=None):
+    client = ReliableLayer()
+    server = ReliableLayer()
+    client.set_fec_block_size(fec_block_size)
+    server.set_fec_block_size(fec_block_size)
+    client.set_compression(compression)
+    server.set_compression(compression)
+
+    # one generator per direction so that each direction sees the same
+    # impairments whatever the other direction does
+    if decisions is None:
+        decisions = (RandomDecisions(random.Random(seed * 2)),
+                     RandomDecisions(random.Random(seed * 2 + 1)))
+    client_to_server = Channel(True, True, True, True,
+                               decisions_=decisions[0])
+    server_to_client = Channel(True, True, True, True,
+                               decisions_=decisions[1])
+
+    client.set_send_channel(client_to_server)
+    client.set_receive_channel(server_to_client)
+    server.set_send_channel(server_to_client)
+    server.set_receive_channel(client_to_server)
+
+    client.set_data_to_send(data)
+    return client, server, client_to_server, server_to_client
+
+
+# Run one iteration of a transfer set up by make_transfer
+def run_iteration(client, server, client_to_server, server_to_client):
+    client.manage()
+    client_to_server.manage()
+    server.manage()
+    server_to_client.manage()
+
+
+# Send data from a client to a server and collect the statistics.
+# input: the same as make_transfer
+# output: a dictionary of statistics for the transfer
+def run_transfer(data, seed, fec_block_size=0, compression=None,
+                 decisions=None):
+    transfer = make_transfer(data, seed, fec_block_size, compression,
+                             decisions)
+    client, server, client_to_server, server_to_client = transfer
+
+    iterations = 1
+    while True:
+        run_iteration(*transfer)
+
+        if server.get_data_received() == data:
+            break
+        if iterations >= MAX_ITERATIONS:
+            raise RuntimeError("transfer did not complete after {0} "
+                               "iterations".format(iterations))
+        iterations += 1
+
+    channels = (client_to_server, server_to_client)
+    return {
+        'iterations': iterations,
+        # the channel counts parity segments as data packets too
+        'data_packets': client_to_server.count_total_data_packets -
+        client_to_server.count_parity_packets,
+        'ack_packets': server_to_client.count_ack_packets,
+        'parity_packets': client_to_server.count_parity_packets,
+        'sent_packets': sum(c.count_sent_packets for c in channels),
+        'checksum_error_packets': client_to_server.
+        count_checksum_error_packets,
+        'dropped_packets': sum(c.count_dropped_packets for c in channels),
+        'delayed_packets': sum(c.count_delayed_packets for c in channels),
+        'out_of_order_packets': sum(c.count_out_of_order_packets
+                                    for c in channels),
+        'recovered': server.count_segments_recovered,
+        'timeouts': client.count_segment_timeouts,
+        'compression_ratio': client.get_compression_ratio(),
+    }
+
+
+# Run a transfer once per seed in range(runs) and average the statistics.
+# input: the string to send, the number of runs and any run_transfer
+#        settings
+# output: a dictionary of mean statistics
+def average_transfers(data, runs, **settings):
+    totals = {}
+    for seed in range(runs):
+        stats = run_transfer(data, seed, **settings)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+    return {key: value / runs for key, value in totals.items()}
@@ -0,0 +1,58 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Tests for the compression stage of the reliable layer. Run
+#              with python -m unittest or python -m pytest.
+#############################################################################
+import unittest
+
+from reliable_layer import *
+from simulation import *
+
+DATA = "The Pug’s motto is the Latin phrase ‘multum in parvo’ (a lot in a " \
+       "little) — an apt description of this small but solid dog. " * 10
+
+
+class CompressionTest(unittest.TestCase):
+
+    def test_incremental_delivery(self):
+        for compression in ('zlib', 'lzma'):
+            transfer = make_transfer(DATA, 0, compression=compression)
+            client, server = transfer[:2]
+            self.assertLess(client.get_compression_ratio(), 1)
+
+            sizes = set()
+            for _ in range(MAX_ITERATIONS):
+                run_iteration(*transfer)
+                received = server.get_data_received()
+                self.assertTrue(DATA.startswith(received))
+                sizes.add(len(received))
+                if received == DATA:
+                    break
+            self.assertEqual(server.get_data_received(), DATA)
+            # the text is decompressed as it arrives, not all at the end
+            self.assertGreater(len(sizes), 2)
+
+    def test_no_compression(self):
+        client = ReliableLayer()
+        client.set_data_to_send(DATA)
+        self.assertEqual(client.data_to_send, DATA)
+        self.assertEqual(client.get_compression_ratio(), 1)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            ReliableLayer().set_compression('gzip')
+
+    def test_compression_set_after_data(self):
+        client = ReliableLayer()
+        client.set_data_to_send(DATA)
+        with self.assertRaises(ValueError):
+            client.set_compression('zlib')
+
+        server = ReliableLayer()
+        server.message_received = 'abcd'
+        with self.assertRaises(ValueError):
+            server.set_compression('zlib')
+
+
+if __name__ == '__main__':
+    unittest.main()
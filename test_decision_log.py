@@ -0,0 +1,94 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Tests for recording and replaying the impairment decisions
+#              of the unreliable channels. Run with python -m unittest or
+#              python -m pytest.
+#############################################################################
+import os
+import random
+import tempfile
+import unittest
+
+from reliable_layer import *
+from simulation import run_transfer
+
+DATA = "The sturdy, well-balanced Labrador Retriever can, depending on " \
+       "the sex, stand from 21.5 to 24.5 inches at the shoulder. " * 3
+
+
+def record(seed):
+    recorders = (DecisionRecorder(random.Random(seed * 2)),
+                 DecisionRecorder(random.Random(seed * 2 + 1)))
+    return recorders, run_transfer(DATA, seed, decisions=recorders)
+
+
+class DecisionLogTest(unittest.TestCase):
+
+    def test_replay_matches_recorded_run(self):
+        for seed in range(5):
+            recorders, recorded = record(seed)
+            replayers = [DecisionReplayer.from_bytes(recorder.to_bytes())
+                         for recorder in recorders]
+            replayed = run_transfer(DATA, seed, decisions=replayers)
+
+            # the iteration count and every channel counter must match
+            self.assertEqual(replayed, recorded)
+
+    def test_save_and_load(self):
+        recorder = record(0)[0][0]
+        fd, path = tempfile.mkstemp(suffix='.decisions')
+        os.close(fd)
+        try:
+            recorder.save(path)
+            replayer = DecisionReplayer.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(replayer.log, recorder.log)
+
+    def test_large_corrupt_index(self):
+        recorder = DecisionRecorder()
+        recorder.log[CORRUPT_INDEX].append(100000)
+        replayer = DecisionReplayer.from_bytes(recorder.to_bytes())
+        self.assertEqual(replayer.choose_index(CORRUPT_INDEX, 200000),
+                         100000)
+
+    def test_exhausted_log_without_fallback(self):
+        replayer = DecisionReplayer.from_bytes(DecisionRecorder().to_bytes())
+        with self.assertRaises(ValueError):
+            replayer.decide(DROP, 0.1)
+        with self.assertRaises(ValueError):
+            replayer.choose_index(CORRUPT_INDEX, 4)
+
+    # A protocol change that sends more segments than the recorded run
+    # draws the extra decisions from the fallback
+    def test_replay_with_fallback_after_protocol_change(self):
+        recorders = record(1)[0]
+        fallback = DecisionRecorder(random.Random(9))
+        replayers = [DecisionReplayer.from_bytes(recorder.to_bytes(),
+                                                 fallback=fallback)
+                     for recorder in recorders]
+        run_transfer(DATA, 1, fec_block_size=3, decisions=replayers)
+        self.assertTrue(any(fallback.log.values()))
+
+    def test_truncated_and_garbage_logs(self):
+        data = record(2)[0][0].to_bytes()
+        for size in range(len(data)):
+            with self.assertRaises(ValueError):
+                DecisionReplayer.from_bytes(data[:size])
+        with self.assertRaises(ValueError):
+            DecisionReplayer.from_bytes(data + b'\x00')
+
+        rng = random.Random(3)
+        for _ in range(2000):
+            garbage = DECISION_LOG_MAGIC + bytes(
+                rng.randrange(256) for _ in range(rng.randrange(40)))
+            try:
+                DecisionReplayer.from_bytes(garbage)
+            except ValueError:
+                pass
+        with self.assertRaises(ValueError):
+            DecisionReplayer.from_bytes(b'garbage')
+
+
+if __name__ == '__main__':
+    unittest.main()
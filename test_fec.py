@@ -0,0 +1,146 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Tests for the forward error correction in the reliable layer.
+#              Run with python -m unittest or python -m pytest.
+#############################################################################
+import unittest
+
+from reliable_layer import *
+from simulation import run_transfer
+
+TEXTS = [
+    "abcdefghij",
+    "American Kennel Club -- Labradors \r\n\r\nThe sturdy, well-balanced "
+    "Labrador Retriever can, depending on the sex, stand from 21.5 to "
+    "24.5 inches at the shoulder.",
+    "The Pug’s motto is the Latin phrase ‘multum in parvo’ (a lot in a "
+    "little) \U0001f436\U0001f436 — an apt description. " * 4,
+]
+
+
+# A channel stand-in that hands segments over without any impairments
+class Link:
+
+    def __init__(self):
+        self.segments = []
+
+    def send(self, seg):
+        self.segments.append(seg)
+
+    def receive(self):
+        segments = self.segments
+        self.segments = []
+        return segments
+
+
+def data_segment(seq, payload):
+    seg = Segment()
+    seg.set_data(seq, payload)
+    return seg
+
+
+# Build the parity segment a client sends for a block of (seqnum, payload)
+# pairs
+def parity_segment(block):
+    client = ReliableLayer()
+    client.set_send_channel(Link())
+    client.send_parity(block)
+    return client.send_channel.segments[0]
+
+
+def make_server(block_size=3):
+    server = ReliableLayer()
+    server.set_fec_block_size(block_size)
+    server.set_send_channel(Link())
+    server.set_receive_channel(Link())
+    return server
+
+
+# Hand segments to the server and let it process them
+def deliver(server, *segments):
+    for seg in segments:
+        server.receive_channel.send(seg)
+    server.manage_receive()
+
+
+class ForwardErrorCorrectionTest(unittest.TestCase):
+
+    def test_recover_last_segment_of_partial_block(self):
+        block = [(0, 'abcd'), (4, 'efgh'), (8, 'ij')]
+        server = make_server()
+        deliver(server, data_segment(0, 'abcd'), data_segment(4, 'efgh'),
+                parity_segment(block))
+        self.assertEqual(server.get_data_received(), 'abcdefghij')
+        self.assertEqual(server.count_segments_recovered, 1)
+
+    def test_recover_middle_segment(self):
+        block = [(0, 'abcd'), (4, 'efgh'), (8, 'ij')]
+        server = make_server()
+        deliver(server, parity_segment(block), data_segment(8, 'ij'),
+                data_segment(0, 'abcd'))
+        self.assertEqual(server.get_data_received(), 'abcdefghij')
+
+    def test_recover_from_delivered_data(self):
+        block = [(0, 'abcd'), (4, 'efgh'), (8, 'ij')]
+        server = make_server()
+        deliver(server, data_segment(0, 'abcd'), data_segment(4, 'efgh'))
+        self.assertEqual(server.get_data_received(), 'abcdefgh')
+        deliver(server, parity_segment(block))
+        self.assertEqual(server.get_data_received(), 'abcdefghij')
+        self.assertEqual(server.parity_received, {})
+
+    def test_two_missing_segments_are_not_recovered(self):
+        block = [(0, 'abcd'), (4, 'efgh'), (8, 'ij')]
+        server = make_server()
+        deliver(server, data_segment(0, 'abcd'), parity_segment(block))
+        self.assertEqual(server.get_data_received(), 'abcd')
+        self.assertEqual(server.count_segments_recovered, 0)
+        self.assertIn(0, server.parity_received)
+
+    # The client resends from the last acknowledged segment so the blocks of
+    # the resend start at a different seqnum than the parity kept from the
+    # first send. Both parities must still agree with the data.
+    def test_stale_parity_after_resend(self):
+        text = 'abcdefghijklmnop'
+        first = [(0, 'abcd'), (4, 'efgh'), (8, 'ijkl')]
+        resend = [(4, 'efgh'), (8, 'ijkl'), (12, 'mnop')]
+        server = make_server()
+        deliver(server, data_segment(0, 'abcd'), parity_segment(first))
+        deliver(server, data_segment(4, 'efgh'), data_segment(12, 'mnop'),
+                parity_segment(resend))
+        self.assertEqual(server.get_data_received(), text)
+        self.assertEqual(server.count_segments_recovered, 1)
+
+    def test_parity_for_delivered_block_is_dropped(self):
+        block = [(0, 'abcd'), (4, 'efgh')]
+        server = make_server()
+        deliver(server, data_segment(0, 'abcd'), data_segment(4, 'efgh'))
+        deliver(server, parity_segment(block))
+        self.assertEqual(server.parity_received, {})
+        self.assertEqual(server.get_data_received(), 'abcdefgh')
+
+    def test_parity_skipped_when_xor_out_of_range(self):
+        client = ReliableLayer()
+        client.set_send_channel(Link())
+        # 0x10ffff ^ 0x0fffff = 0x1f0000, past the last code point
+        client.send_parity([(0, chr(0x10ffff)), (1, chr(0x0fffff))])
+        self.assertEqual(client.send_channel.segments, [])
+        self.assertEqual(client.count_parity_segments_sent, 0)
+
+    # Every block size, with and without compression, must deliver every
+    # text exactly over the impaired channels
+    def test_transfers_complete(self):
+        for block_size in (0, 1, 2, 3, 4, 7):
+            for compression in (None, 'zlib', 'lzma'):
+                for text in TEXTS:
+                    for seed in range(3):
+                        # run_transfer only returns once the data received
+                        # equals the data sent
+                        stats = run_transfer(text, seed, block_size,
+                                             compression)
+                        if block_size == 0:
+                            self.assertEqual(stats['parity_packets'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
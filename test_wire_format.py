@@ -0,0 +1,125 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Tests for the binary wire format of a Segment. Run with
+#              python -m unittest or python -m pytest.
+#############################################################################
+import random
+import unittest
+
+from reliable_layer import *
+from wire_format import *
+
+# Payload chars from the one, two, three and four byte UTF-8 ranges
+PAYLOAD_CHARS = 'aZ \r\n\x00\xe9’“\U0001f600'
+
+
+def random_segments(rng, count):
+    segments = []
+    for i in range(count):
+        seg = Segment()
+        kind = rng.randrange(3)
+        if kind == 0:
+            payload = ''.join(rng.choice(PAYLOAD_CHARS)
+                              for _ in range(rng.randrange(1, 9)))
+            seg.set_data(rng.randrange(10000), payload)
+            # corrupted segments must keep their original checksum
+            if rng.random() < 0.3:
+                seg.create_checksum_error(rng.randrange(len(payload)))
+        elif kind == 1:
+            seg.set_ack(rng.randrange(10000))
+        else:
+            payload = ''.join(rng.choice(PAYLOAD_CHARS)
+                              for _ in range(rng.randrange(1, 5)))
+            seg.set_parity(rng.randrange(10000), rng.randrange(1, 13),
+                           payload)
+        segments.append(seg)
+    return segments
+
+
+def fields(seg):
+    return (seg.seq_num, seg.ack_num, seg.payload, seg.checksum,
+            seg.parity_span, seg.check_checksum())
+
+
+class WireFormatTest(unittest.TestCase):
+
+    def test_round_trip_single_segments(self):
+        for seg in random_segments(random.Random(1), 300):
+            encoded = serialize_segment(seg)
+            self.assertEqual(fields(parse_segment(encoded)), fields(seg))
+
+    def test_round_trip_batch(self):
+        segments = random_segments(random.Random(2), 300)
+        decoded = decode_segments(encode_segments(segments))
+        self.assertEqual([fields(seg) for seg in decoded],
+                         [fields(seg) for seg in segments])
+
+    # The XOR of two CJK chars can be a lone surrogate, which must still
+    # survive a round trip
+    def test_round_trip_parity_from_send_parity(self):
+        client = ReliableLayer()
+        client.set_send_channel(Channel(False, False, False, False))
+        client.send_parity([(0, '中中中中'), (4, '阿阿阿阿')])
+        parity = client.send_channel.send_queue[0]
+        self.assertEqual(parity.payload, '\ud812' * 4)
+        decoded = decode_segments(encode_segments([parity]))
+        self.assertEqual([fields(seg) for seg in decoded], [fields(parity)])
+
+    def test_empty_batch(self):
+        self.assertEqual(encode_segments([]), b'')
+        self.assertEqual(decode_segments(b''), [])
+
+    def test_trailing_bytes_rejected(self):
+        seg = Segment()
+        seg.set_ack(8)
+        with self.assertRaises(ValueError):
+            parse_segment(serialize_segment(seg) + b'\x00')
+
+    def test_unencodable_segment_rejected(self):
+        seg = Segment()
+        seg.set_data(2 ** 31, 'abcd')
+        with self.assertRaises(ValueError):
+            serialize_segment(seg)
+
+    def test_unsupported_version_rejected(self):
+        header = HEADER.pack(1, FLAG_DATA, 0, -1, 0, 0)
+        with self.assertRaises(ValueError):
+            parse_segment(header)
+
+    def test_flags_must_match_fields(self):
+        mismatched = [
+            HEADER.pack(WIRE_FORMAT_VERSION, FLAG_DATA, 0, 4, 0, 0),
+            HEADER.pack(WIRE_FORMAT_VERSION, FLAG_ACK, 0, 4, 0, 0),
+            HEADER.pack(WIRE_FORMAT_VERSION, FLAG_ACK, -1, 4, 1, 0) + b'a',
+            HEADER.pack(WIRE_FORMAT_VERSION, FLAG_PARITY, 0, 0, 0, 0),
+            HEADER.pack(WIRE_FORMAT_VERSION, FLAG_DATA | FLAG_ACK, -1, -1,
+                        0, 0),
+        ]
+        for buffer in mismatched:
+            with self.assertRaises(ValueError):
+                parse_segment(buffer)
+
+    # Any mutation of a valid buffer must either decode or raise a
+    # ValueError, never any other exception
+    def test_fuzz_mutated_buffers(self):
+        rng = random.Random(3)
+        buffer = encode_segments(random_segments(rng, 40))
+        for _ in range(20000):
+            mutated = bytearray(buffer[:rng.randrange(len(buffer) + 1)])
+            for _ in range(rng.randrange(4)):
+                position = rng.randrange(len(mutated) + 1)
+                action = rng.randrange(3)
+                if action == 0 and position < len(mutated):
+                    mutated[position] = rng.randrange(256)
+                elif action == 1:
+                    mutated.insert(position, rng.randrange(256))
+                elif position < len(mutated):
+                    del mutated[position]
+            try:
+                decode_segments(bytes(mutated))
+            except ValueError:
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
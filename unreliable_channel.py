@@ -1,11 +1,26 @@
 #############################################################################
 # Date:        5/1/2020
-# Description: Provided implementation of the unreliable channel. This code
-#              has not been modified.
+# Description: Provided implementation of the unreliable channel. The code
+#              has not been modified except to let each channel draw its
+#              impairment decisions from its own decision source, which
+#              can record the decisions to a log and replay them later, and
+#              to add parity segments for forward error correction.
 #############################################################################
 import random
+import struct
 from functools import reduce
 
+# The kinds of yes/no impairment decisions a channel makes
+REORDER = 'reorder'
+DELAY = 'delay'
+DROP = 'drop'
+CORRUPT = 'corrupt'
+DECISION_KINDS = (REORDER, DELAY, DROP, CORRUPT)
+# The payload position picked when a segment is corrupted
+CORRUPT_INDEX = 'corrupt_index'
+# Marks the start of an encoded decision log
+DECISION_LOG_MAGIC = b'CDL2'
+
 
 class Segment:
 
@@ -14,6 +29,8 @@ class Segment:
         self.ack_num = -1
         self.payload = ''
         self.checksum = 0
+        # number of data chars covered by a parity segment, 0 otherwise
+        self.parity_span = 0
         self.start_iteration = 0
         self.start_delay_iteration = 0
 
@@ -21,6 +38,7 @@ class Segment:
         self.seq_num = seq
         self.ack_num = -1
         self.payload = data
+        self.parity_span = 0
         self.checksum = 0
         str = self.to_string()
         self.checksum = self.calc_checksum(str)
@@ -29,10 +47,25 @@ class Segment:
         self.seq_num = -1
         self.ack_num = ack
         self.payload = ''
+        self.parity_span = 0
         self.checksum = 0
         str = self.to_string()
         self.checksum = self.calc_checksum(str)
 
+    # A parity segment holds the XOR of the data segments that cover the
+    # span chars starting at seq
+    def set_parity(self, seq, span, data):
+        self.seq_num = seq
+        self.ack_num = -1
+        self.payload = data
+        self.parity_span = span
+        self.checksum = 0
+        str = self.to_string()
+        self.checksum = self.calc_checksum(str)
+
+    def is_parity(self):
+        return self.parity_span > 0
+
     def set_start_iteration(self, iteration):
         self.start_iteration = iteration
 
@@ -46,6 +79,10 @@ class Segment:
         return self.start_delay_iteration
 
     def to_string(self):
+        if self.is_parity():
+            return "seq: {0}, ack: {1}, parity: {2}, data: {3}" \
+                .format(self.seq_num, self.ack_num, self.parity_span,
+                        self.payload)
         return "seq: {0}, ack: {1}, data: {2}" \
             .format(self.seq_num, self.ack_num, self.payload)
 
@@ -59,14 +96,151 @@ class Segment:
     def dump(self):
         print(self.to_string())
 
-    # Function to cause an error
-    def create_checksum_error(self):
+    # Function to cause an error. The character at payload[index] is
+    # replaced, or a random one if no index is given
+    def create_checksum_error(self, index=None):
         if not self.payload:
             return
-        char = random.choice(self.payload)
+        if index is None:
+            char = random.choice(self.payload)
+        else:
+            char = self.payload[index]
         self.payload = self.payload.replace(char, 'X', 1)
 
 
+# Draws impairment decisions from a random number generator. Any object
+# with random() and randrange() methods works, eg a seeded random.Random.
+# By default the global random module is used.
+class RandomDecisions:
+
+    def __init__(self, rng=None):
+        self.rng = random if rng is None else rng
+
+    # Returns true if an impairment of the given kind happens
+    def decide(self, kind, ratio):
+        return self.rng.random() <= ratio
+
+    # Returns a position in [0, n) for an impairment of the given kind
+    def choose_index(self, kind, n):
+        return self.rng.randrange(n)
+
+
+# Draws decisions like RandomDecisions and records every outcome so the
+# run can be replayed with DecisionReplayer. Each kind of decision is kept
+# in its own stream, so the n-th drop decision replays as the n-th drop
+# decision even if a protocol change alters how decisions interleave.
+class DecisionRecorder(RandomDecisions):
+
+    def __init__(self, rng=None):
+        super().__init__(rng)
+        self.log = {kind: [] for kind in DECISION_KINDS + (CORRUPT_INDEX,)}
+
+    def decide(self, kind, ratio):
+        result = super().decide(kind, ratio)
+        self.log[kind].append(result)
+        return result
+
+    def choose_index(self, kind, n):
+        result = super().choose_index(kind, n)
+        self.log[kind].append(result)
+        return result
+
+    # Encode the log: for each yes/no kind a count followed by the outcomes
+    # packed one bit each, then a count and the corrupt indices as 32 bit
+    # values
+    def to_bytes(self):
+        out = bytearray(DECISION_LOG_MAGIC)
+        for kind in DECISION_KINDS:
+            bits = self.log[kind]
+            packed = bytearray((len(bits) + 7) // 8)
+            for i, bit in enumerate(bits):
+                if bit:
+                    packed[i // 8] |= 1 << (i % 8)
+            out += struct.pack('!I', len(bits)) + packed
+        indices = self.log[CORRUPT_INDEX]
+        out += struct.pack('!I{0}I'.format(len(indices)), len(indices),
+                           *indices)
+        return bytes(out)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+
+# Feeds back the decisions recorded by a DecisionRecorder. The recorded
+# probabilities are ignored. Decisions are replayed per kind, not per
+# segment: the n-th drop decision replays as the n-th drop decision, which
+# is a different segment if a protocol change alters what is sent. When a
+# stream runs out the fallback decision source is used if one was given,
+# otherwise a ValueError is raised, so pass a fallback when replaying
+# against a changed protocol.
+class DecisionReplayer:
+
+    def __init__(self, log, fallback=None):
+        self.log = {kind: list(values) for kind, values in log.items()}
+        self.positions = {kind: 0 for kind in self.log}
+        self.fallback = fallback
+
+    @classmethod
+    def from_bytes(cls, data, fallback=None):
+        if data[:len(DECISION_LOG_MAGIC)] != DECISION_LOG_MAGIC:
+            raise ValueError("not a channel decision log")
+        offset = len(DECISION_LOG_MAGIC)
+        log = {}
+        try:
+            for kind in DECISION_KINDS:
+                count, = struct.unpack_from('!I', data, offset)
+                offset += 4
+                packed = data[offset: offset + (count + 7) // 8]
+                if len(packed) != (count + 7) // 8:
+                    raise ValueError("truncated channel decision log")
+                offset += len(packed)
+                log[kind] = [bool(packed[i // 8] >> (i % 8) & 1)
+                             for i in range(count)]
+            count, = struct.unpack_from('!I', data, offset)
+            offset += 4
+            if len(data) - offset != count * 4:
+                raise ValueError("corrupt channel decision log")
+            log[CORRUPT_INDEX] = list(
+                struct.unpack_from('!{0}I'.format(count), data, offset))
+        except struct.error:
+            raise ValueError("truncated channel decision log")
+        return cls(log, fallback)
+
+    @classmethod
+    def load(cls, path, fallback=None):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read(), fallback)
+
+    def next_value(self, kind):
+        position = self.positions.get(kind, 0)
+        values = self.log.get(kind, [])
+        if position >= len(values):
+            return None
+        self.positions[kind] = position + 1
+        return values[position]
+
+    def decide(self, kind, ratio):
+        result = self.next_value(kind)
+        if result is None:
+            if self.fallback is None:
+                raise ValueError("decision log has no more '{0}' decisions"
+                                 .format(kind))
+            return self.fallback.decide(kind, ratio)
+        return result
+
+    def choose_index(self, kind, n):
+        result = self.next_value(kind)
+        if result is None:
+            if self.fallback is None:
+                raise ValueError("decision log has no more '{0}' decisions"
+                                 .format(kind))
+            return self.fallback.choose_index(kind, n)
+        # the payload may be shorter than when recording if the protocol
+        # changed, so keep the index in range
+        return result % n
+
+
 class Channel:
     DROPPED_PACKET_RATIO = 0.1
     DELAYED_PACKET_RATIO = 0.1
@@ -74,8 +248,11 @@ class Channel:
     OUT_OF_ORDER_PACKET_RATIO = 0.1
     NUM_ITERATIONS_TO_DELAY_PACKETS = 5
 
+    # Impairment decisions come from decisions_ if given, otherwise from a
+    # RandomDecisions using rng_ (the global random module if None)
     def __init__(self, can_deliver_out_of_order_, can_drop_packets_,
-                 can_delay_packets_, can_have_checksum_errors_):
+                 can_delay_packets_, can_have_checksum_errors_, rng_=None,
+                 decisions_=None):
         self.send_queue = []
         self.receive_queue = []
         self.delayed_packets = []
@@ -83,6 +260,9 @@ class Channel:
         self.can_drop_packets = can_drop_packets_
         self.can_delay_packets = can_delay_packets_
         self.can_have_checksum_errors = can_have_checksum_errors_
+        if decisions_ is None:
+            decisions_ = RandomDecisions(rng_)
+        self.decisions = decisions_
         # stats
         self.count_total_data_packets = 0
         self.count_sent_packets = 0
@@ -91,6 +271,8 @@ class Channel:
         self.count_delayed_packets = 0
         self.count_out_of_order_packets = 0
         self.count_ack_packets = 0
+        # parity segments, which are also counted as data packets
+        self.count_parity_packets = 0
         self.current_iteration = 0
 
     def send(self, seg):
@@ -108,8 +290,8 @@ class Channel:
             return
 
         if self.can_deliver_out_of_order:
-            val = random.random()
-            if val <= Channel.OUT_OF_ORDER_PACKET_RATIO:
+            if self.decisions.decide(REORDER,
+                                     Channel.OUT_OF_ORDER_PACKET_RATIO):
                 self.count_out_of_order_packets += 1
                 self.send_queue.reverse()
 
@@ -133,16 +315,16 @@ class Channel:
 
             add_to_receive_queue = False
             if self.can_delay_packets:
-                val = random.random()
-                if val <= Channel.DELAYED_PACKET_RATIO:
+                if self.decisions.decide(DELAY,
+                                         Channel.DELAYED_PACKET_RATIO):
                     self.count_delayed_packets += 1
                     seg.set_start_delay_iteration(self.current_iteration)
                     self.delayed_packets.append(seg)
                     continue
 
             if self.can_drop_packets:
-                val = random.random()
-                if val <= Channel.DROPPED_PACKET_RATIO:
+                if self.decisions.decide(DROP,
+                                         Channel.DROPPED_PACKET_RATIO):
                     self.count_dropped_packets += 1
                 else:
                     add_to_receive_queue = True
@@ -155,12 +337,18 @@ class Channel:
 
             if seg.ack_num == -1:
                 self.count_total_data_packets += 1
+                if seg.is_parity():
+                    self.count_parity_packets += 1
 
                 # only data packets can have checksum errors...
                 if self.can_have_checksum_errors:
-                    val = random.random()
-                    if val <= Channel.DATA_ERROR_PACKET_RATIO:
-                        seg.create_checksum_error()
+                    if self.decisions.decide(
+                            CORRUPT, Channel.DATA_ERROR_PACKET_RATIO):
+                        index = None
+                        if seg.payload:
+                            index = self.decisions.choose_index(
+                                CORRUPT_INDEX, len(seg.payload))
+                        seg.create_checksum_error(index)
                         self.count_checksum_error_packets += 1
 
             else:
@@ -0,0 +1,134 @@
+#############################################################################
+# Date:        10/19/2026
+# Description: Compact, versioned binary encoding of a Segment so that
+#              segments can be logged, replayed, sent over sockets or moved
+#              between processes without pickling them.
+#
+# Every encoded segment is a fixed size header followed by the payload:
+#
+#   version   1 byte   WIRE_FORMAT_VERSION
+#   flags     1 byte   FLAG_DATA, FLAG_ACK or FLAG_PARITY
+#   seq       4 bytes  signed, -1 for ack segments
+#   ack       4 bytes  signed, -1 for data segments, the parity span for
+#                      parity segments
+#   length    2 bytes  number of payload bytes that follow the header
+#   checksum  4 bytes  the Segment checksum, stored as-is
+#   payload   length bytes of UTF-8 text, empty for ack segments. Lone
+#             surrogates are allowed ('surrogatepass') since the XOR in a
+#             parity segment can produce them
+#
+# All header fields are in network (big-endian) byte order. Encoded
+# segments are self delimiting, so a batch is simply the concatenation of
+# its encoded segments.
+#
+# Version 2 added FLAG_PARITY and the parity span in the ack field.
+#############################################################################
+import struct
+
+from unreliable_channel import Segment
+
+WIRE_FORMAT_VERSION = 2
+
+FLAG_DATA = 0x01
+FLAG_ACK = 0x02
+FLAG_PARITY = 0x04
+
+HEADER = struct.Struct('!BBiiHI')
+HEADER_SIZE = HEADER.size
+
+
+# Encode a single segment.
+# input: a Segment object
+# output: the encoded bytes
+def serialize_segment(seg):
+    payload = seg.payload.encode('utf-8', 'surrogatepass')
+    ack = seg.ack_num
+    if seg.is_parity():
+        flags = FLAG_PARITY
+        ack = seg.parity_span
+    elif seg.ack_num == -1:
+        flags = FLAG_DATA
+    else:
+        flags = FLAG_ACK
+    try:
+        header = HEADER.pack(WIRE_FORMAT_VERSION, flags, seg.seq_num,
+                             ack, len(payload), seg.checksum)
+    except struct.error as err:
+        raise ValueError("segment cannot be encoded: {0}".format(err))
+    return header + payload
+
+
+# Decode one segment starting at offset in buffer.
+# input: a bytes-like buffer and the offset of the segment header
+# output: the decoded Segment and the offset just past its payload
+def parse_segment_from(buffer, offset=0):
+    if len(buffer) - offset < HEADER_SIZE:
+        raise ValueError("truncated segment header at offset {0}"
+                         .format(offset))
+
+    version, flags, seq, ack, length, checksum = \
+        HEADER.unpack_from(buffer, offset)
+
+    if version != WIRE_FORMAT_VERSION:
+        raise ValueError("unsupported wire format version {0}"
+                         .format(version))
+    if flags not in (FLAG_DATA, FLAG_ACK, FLAG_PARITY):
+        raise ValueError("invalid segment flags 0x{0:02x}".format(flags))
+
+    start = offset + HEADER_SIZE
+    end = start + length
+    if end > len(buffer):
+        raise ValueError("truncated segment payload at offset {0}"
+                         .format(offset))
+
+    # the flag must agree with the fields it describes
+    if flags == FLAG_DATA and ack != -1:
+        raise ValueError("data segment with ack {0}".format(ack))
+    if flags == FLAG_ACK and (seq != -1 or length != 0):
+        raise ValueError("ack segment with seq {0} and {1} payload bytes"
+                         .format(seq, length))
+    if flags == FLAG_PARITY and ack <= 0:
+        raise ValueError("invalid parity span {0}".format(ack))
+
+    seg = Segment()
+    seg.seq_num = seq
+    seg.ack_num = ack
+    if flags == FLAG_PARITY:
+        seg.ack_num = -1
+        seg.parity_span = ack
+    # UnicodeDecodeError is a ValueError so bad payloads are reported the
+    # same way as bad headers
+    seg.payload = bytes(buffer[start:end]).decode('utf-8', 'surrogatepass')
+    seg.checksum = checksum
+    return seg, end
+
+
+# Decode a buffer that holds exactly one encoded segment.
+# input: a bytes-like buffer
+# output: the decoded Segment
+def parse_segment(buffer):
+    seg, end = parse_segment_from(buffer)
+    if end != len(buffer):
+        raise ValueError("{0} trailing bytes after segment"
+                         .format(len(buffer) - end))
+    return seg
+
+
+# Encode a list of segments into a single buffer.
+# input: an iterable of Segment objects
+# output: the encoded bytes
+def encode_segments(segments):
+    return b''.join(serialize_segment(seg) for seg in segments)
+
+
+# Decode a buffer produced by encode_segments.
+# input: a bytes-like buffer
+# output: a list of Segment objects in the order they were encoded
+def decode_segments(buffer):
+    view = memoryview(buffer)
+    segments = []
+    offset = 0
+    while offset < len(view):
+        seg, offset = parse_segment_from(view, offset)
+        segments.append(seg)
+    return segments